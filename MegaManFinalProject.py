@@ -1,22 +1,38 @@
+import gc
 import pygame
 import os
 import random
 import pygame.mixer
 
+from collision_map import CollisionMap
+from frame_pacing import FramePacer, create_display, default_strategy
+from input_buffer import InputBuffer
+from leaderboard import Leaderboard, calculate_score, default_leaderboard_path
+from telemetry import Telemetry, default_telemetry_dir
+
 # Constants
 SCREEN_WIDTH = 640
 SCREEN_HEIGHT = 480
 FPS = 60
+PLAYER_NAME = os.environ.get("MEGAMAN_PLAYER", "Shayla")
+MEASURE_INPUT_LATENCY = os.environ.get("MEGAMAN_LATENCY") == "1"
+SHOW_FRAME_STATS = os.environ.get("MEGAMAN_FRAME_STATS") == "1"
+GAME_MODE = os.environ.get("MEGAMAN_MODE", "boss")  # "boss" for the normal fight, "stress" for the bullet-hell mode
 
 # Initialize Pygame
 pygame.init()
 pygame.mixer.init()
 
-# Set up the display
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+# Set up the display; the pacing strategy decides whether it is created with vsync
+screen, pacing_strategy = create_display((SCREEN_WIDTH, SCREEN_HEIGHT), default_strategy())
+
+# Load background image, converted to the display format so the per-frame blit is cheap
+background_image = pygame.transform.scale(pygame.image.load("assets/BG.png"), screen.get_size()).convert()
 
-# Load background image
-background_image = pygame.transform.scale(pygame.image.load("assets/BG.png"), screen.get_size())
+# Fonts are created once instead of every frame
+hud_font = pygame.font.Font(None, 36)
+small_font = pygame.font.Font(None, 24)
+debug_font = pygame.font.Font(None, 20)
 
 # Constants
 STANDING_IMAGES_COUNT = 2
@@ -27,6 +43,34 @@ IDLE_IMAGES_COUNT = 2
 BUSTER_IMAGES_COUNT = 2
 laser_sound = pygame.mixer.Sound('assets/laser_sound.wav')
 
+# Bullets are updated once per frame at the distance the game loop's two bullet passes used to cover
+BULLET_SPEED = 14
+SCREEN_RECT = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+# Teams decide who a bullet can hurt; bullets never hit their own team
+PLAYER_TEAM = 0
+BOSS_TEAM = 1
+TEAM_NAMES = {PLAYER_TEAM: "player", BOSS_TEAM: "boss"}
+
+# Stress mode settings
+STRESS_BOSS_COUNT = 50
+STRESS_MAX_BULLETS = 5000
+STRESS_SPREAD_COUNT = 11  # Bullets in each spread
+STRESS_SPREAD_COOLDOWN = 2  # Frames between spreads from the same boss
+
+# Gameplay event stream, drained to disk by a background writer
+telemetry = Telemetry()
+
+
+# Images are loaded from disk once and shared, so spawning many bosses and bullets stays cheap
+image_cache = {}
+
+
+def load_image(image_path):
+    if image_path not in image_cache:
+        image_cache[image_path] = pygame.image.load(image_path).convert_alpha()
+    return image_cache[image_path]
+
 
 # Function to load player images
 def load_images(prefix, count):
@@ -36,10 +80,62 @@ def load_images(prefix, count):
         if not os.path.exists(image_path):
             # If the image with the number doesn't exist, try without the number
             image_path = f'assets/{prefix}.png'
-        images.append(pygame.image.load(image_path).convert_alpha())
+        images.append(load_image(image_path))
     return images
 
 
+# The bullet is fully opaque or fully transparent, so run-length encoding makes
+# blitting thousands of them much cheaper without changing how they look
+bullet_image = load_image('assets/bullet.png')
+bullet_image.set_alpha(255, pygame.RLEACCEL)
+
+
+def update_bullets():
+    # Moves every bullet, then resolves hits and off-screen bullets with a few rect
+    # calls per frame instead of one Python update per bullet
+    by_team = {team: ([], []) for team in TEAM_NAMES}  # team -> (bullets, rects)
+    for bullet in bullet_group.sprites():
+        rect = bullet.rect
+        rect.move_ip(bullet.speed, bullet.speed_y)
+        bullets, rects = by_team[bullet.team]
+        bullets.append(bullet)
+        rects.append(rect)
+
+    # Each combatant takes every overlapping bullet from another team;
+    # a bullet is spent on the first combatant it hits
+    spent = set()
+    for target in list(player_group) + list(boss_group):
+        for team, (bullets, rects) in by_team.items():
+            if team == target.team:
+                continue
+            landed = []
+            for index in target.hitbox.collidelistall(rects):
+                bullet = bullets[index]
+                if bullet in spent or not target.alive():
+                    continue
+                spent.add(bullet)
+                landed.append(bullet)
+                if bullet.shooter is player:
+                    player.bullets_landed += 1
+                target.take_hit(bullet)
+
+            # One event per target and team each frame, at the first hit's position
+            if landed:
+                telemetry.emit("hit", shooter=TEAM_NAMES[team], target=TEAM_NAMES[target.team],
+                               x=landed[0].rect.x, y=landed[0].rect.y, count=len(landed))
+
+    # Remove spent bullets and the ones that went off-screen
+    for bullets, rects in by_team.values():
+        on_screen = SCREEN_RECT.collidelistall(rects)
+        if len(on_screen) < len(bullets):
+            on_screen = set(on_screen)
+            for index, bullet in enumerate(bullets):
+                if index not in on_screen:
+                    bullet.kill()
+    for bullet in spent:
+        bullet.kill()
+
+
 # Player class
 class Player(pygame.sprite.Sprite):
     def __init__(self, x, y, max_health):
@@ -57,11 +153,16 @@ class Player(pygame.sprite.Sprite):
         self.rect = self.image.get_rect(topleft=(x, y))
         self.speed_x = 0
         self.speed_y = 0
+        self.on_ground = False
+        self.team = PLAYER_TEAM
         self.facing_right = True
         self.is_shooting = False
         self.invincible = False
         self.invincibility_duration = 3
         self.invincibility_timer = 0
+        self.hurt_flash_duration = 0.5  # Seconds the player flashes after a hit
+        self.hurt_flash_frequency = 10  # Frames per flash
+        self.hurt_flash_frames = 0  # Frames of flashing left
         # Health attributes
         self.max_health = max_health
         self.health = self.max_health
@@ -83,16 +184,18 @@ class Player(pygame.sprite.Sprite):
         self.bullets_landed = 0  # Track how many bullets the player lands on the boss
 
     def update(self):
-        # Update player position
+        # Update player position, keeping the player between the walls
         self.rect.x += self.speed_x
-        self.rect.y += self.speed_y
+        collision_map.clamp_horizontal(self.rect)
 
-        # Apply gravity
-        self.speed_y += 0.5
+        # Move vertically against the level geometry and land on the floor or a platform
+        self.on_ground = collision_map.move_vertical(self.rect, self.speed_y)
 
-        # Keep the player within the screen boundaries
-        self.rect.x = max(0, min(self.rect.x, SCREEN_WIDTH - self.rect.width))
-        self.rect.y = max(0, min(self.rect.y, SCREEN_HEIGHT - self.rect.height))
+        # Apply gravity
+        if self.on_ground:
+            self.speed_y = 0
+        else:
+            self.speed_y += 0.5
 
         # Update animation based on movement or shooting
         if self.is_shooting:
@@ -104,6 +207,12 @@ class Player(pygame.sprite.Sprite):
         else:
             self.update_standing_animation()
 
+        # Flash the hurt image for a few frames after a hit, without stopping the game
+        if self.hurt_flash_frames > 0:
+            self.hurt_flash_frames -= 1
+            if self.hurt_flash_frames % self.hurt_flash_frequency >= self.hurt_flash_frequency // 2:
+                self.image = pygame.transform.flip(self.hurt_image, not self.facing_right, False)
+
         # Check for invincibility
         if self.invincible:
             self.invincibility_timer += 1
@@ -114,31 +223,21 @@ class Player(pygame.sprite.Sprite):
         # Update hitbox position
         self.hitbox.topleft = (self.rect.x, self.rect.y)
 
-    def update_hurt_animation(self):
+    def update_hurt_animation(self, attacker):
         if not self.invincible:
-            # Decrease player health
-            if boss_enemy.current_behavior == "sword_charge":
-                self.health -= 5
-            else:
-                self.health -= 2
+            # Decrease player health by what the attacking boss deals
+            damage = attacker.contact_damage()
+            self.health -= damage
+            telemetry.emit("damage", target="player", amount=damage, health=self.health,
+                           source=attacker.current_behavior)
 
             # Check if player is still alive
             if self.health <= 0:
                 self.kill()  # Remove player from sprite groups
+                telemetry.emit("death", target="player", x=self.rect.x, y=self.rect.y)
 
-            # Flash white for a few frames
-            flash_duration = 0.5  # Adjust the flash duration as needed
-            flash_frequency = 10  # Adjust the flash frequency as needed
-
-            flash_timer = 0
-
-            while flash_timer < flash_duration * FPS:
-                if flash_timer % flash_frequency == 0:
-                    self.image = pygame.transform.flip(self.hurt_image, not self.facing_right, False)
-                    pygame.display.flip()  # Update the display
-                    pygame.time.delay(50)
-
-                flash_timer += 1
+            # Flash white for a few frames; Player.update draws the flash
+            self.hurt_flash_frames = int(self.hurt_flash_duration * FPS)
 
             self.invincible = True
             self.speed_x = 0
@@ -180,12 +279,8 @@ class Player(pygame.sprite.Sprite):
         # Plays the sound effect
         laser_sound.play()
 
-    def update_bullets(self):
-        for bullet in bullet_group:
-            bullet.update()
-            if bullet.hitbox.colliderect(boss_enemy.hitbox):
-                boss_enemy.reduce_health(5)
-                self.bullets_landed += 1
+    def take_hit(self, bullet):
+        self.update_hurt_animation(bullet.shooter)
 
     def get_centerx(self):
         return self.rect.centerx
@@ -193,14 +288,16 @@ class Player(pygame.sprite.Sprite):
 
 # Bullet class
 class Bullet(pygame.sprite.Sprite):
-    def __init__(self, x, y, direction, shooter):
+    def __init__(self, x, y, direction, shooter, speed_y=0):
         super().__init__()
 
         # Load bullet image
-        self.image = pygame.image.load('assets/bullet.png').convert_alpha()
+        self.image = bullet_image
         self.rect = self.image.get_rect()
-        self.speed = 7 * direction
+        self.speed = BULLET_SPEED * direction
+        self.speed_y = speed_y  # Vertical drift, used by spread patterns
         self.shooter = shooter  # Store a reference to the object that fired the bullet
+        self.team = shooter.team  # The team decides what the bullet can hit
 
         # Adjust bullet position based on direction
         if direction == 1:
@@ -208,25 +305,8 @@ class Bullet(pygame.sprite.Sprite):
         else:
             self.rect.topright = (x, y)
 
-        # Set up hitbox
-        self.hitbox = pygame.Rect(self.rect.x, self.rect.y, self.image.get_width(), self.image.get_height())
-
-    def update(self):
-        self.rect.x += self.speed
-        self.hitbox.topleft = (self.rect.x, self.rect.y)
-
-        # Check for collisions based on the shooter
-        if self.shooter == player and self.rect.colliderect(boss_enemy.hitbox):
-            boss_enemy.reduce_health(5)  # Adjust the damage value as needed
-            self.kill()
-
-        elif self.shooter == boss_enemy and self.rect.colliderect(player.hitbox):
-            player.update_hurt_animation()
-            self.kill()
-
-        # Remove the bullet when it goes off-screen
-        if self.rect.right < 0 or self.rect.left > SCREEN_WIDTH:
-            self.kill()
+        # Set up hitbox; it always covers the whole image, so it shares the rect
+        self.hitbox = self.rect
 
     def draw_hitbox(self, screen):
         pygame.draw.rect(screen, (255, 0, 0), self.hitbox, 2)
@@ -238,12 +318,12 @@ class BossEnemy(pygame.sprite.Sprite):
         super().__init__()
 
         # Load boss enemy sprites
-        self.idle_image = pygame.image.load('assets/boss_enemy_idle.png').convert_alpha()
-        self.floating_image = pygame.image.load('assets/boss_enemy_floating.png').convert_alpha()
-        self.buster_image = pygame.image.load('assets/boss_enemy_buster.png').convert_alpha()
-        self.sword_charge_image = pygame.image.load('assets/boss_enemy_sword_charge.png').convert_alpha()
-        self.alt_buster_image = pygame.image.load('assets/Alt_boss_enemy3.png').convert_alpha()
-        self.alt_sword_charge_image = pygame.image.load('assets/Alt_boss_enemy4.png').convert_alpha()
+        self.idle_image = load_image('assets/boss_enemy_idle.png')
+        self.floating_image = load_image('assets/boss_enemy_floating.png')
+        self.buster_image = load_image('assets/boss_enemy_buster.png')
+        self.sword_charge_image = load_image('assets/boss_enemy_sword_charge.png')
+        self.alt_buster_image = load_image('assets/Alt_boss_enemy3.png')
+        self.alt_sword_charge_image = load_image('assets/Alt_boss_enemy4.png')
 
         # Set the initial image and rect
         self.image = self.idle_image
@@ -268,9 +348,15 @@ class BossEnemy(pygame.sprite.Sprite):
         self.current_behavior_frame = 0
         self.bullet_counter = 0
         self.max_bullets = 3
+        self.volley_size = 3  # Bullets in one buster volley
         self.bullet_cooldown = int(FPS * 0.5)
         self.bullet_timer = 0
         self.facing_right = True
+        self.team = BOSS_TEAM
+        # Spread pattern attributes, used by the stress mode
+        self.spread_count = STRESS_SPREAD_COUNT
+        self.spread_cooldown = STRESS_SPREAD_COOLDOWN
+        self.spread_timer = 0
 
         # Initialize the boss with an initial behavior
         self.choose_next_behavior()
@@ -280,7 +366,7 @@ class BossEnemy(pygame.sprite.Sprite):
 
     def update(self):
         self.rect.x += self.speed_x
-        self.rect.y += self.speed_y
+        collision_map.move_vertical(self.rect, self.speed_y, one_way=False)
 
         # Adjust boss's image to smoothly face the player character
         player_center = player.rect.centerx
@@ -338,22 +424,23 @@ class BossEnemy(pygame.sprite.Sprite):
 
             self.execute_current_behavior()
 
-    def check_bullet_collisions(self):
-        # Check for collisions with bullets
-        for bullet in bullet_group:
-            if bullet.hitbox.colliderect(self.hitbox):
-                bullet.kill()
-                print("Boss hitbox:", self.hitbox.topleft)
-                self.health -= 5
+    def take_hit(self, bullet):
+        self.reduce_health(5)  # Adjust the damage value as needed
+
+    def contact_damage(self):
+        # Damage dealt to the player by touching this boss or one of its bullets
+        if self.current_behavior == "sword_charge":
+            return 5
+        return 2
 
     def reduce_health(self, amount):
         self.health -= amount
-        print(f"Boss health reduced to {self.health}")
+        telemetry.emit("damage", target="boss", amount=amount, health=self.health)
 
         # Check if the boss is still alive
         if self.health <= 0:
             self.kill()  # Remove boss from sprite groups
-            print("Boss VANQUISHED!")
+            telemetry.emit("death", target="boss", x=self.rect.x, y=self.rect.y)
 
     def switch_boss_behavior(self):
         behaviors = ["idle", "floating", "buster", "sword_charge"]
@@ -420,7 +507,7 @@ class BossEnemy(pygame.sprite.Sprite):
         # If boss is in the sword_charge state, charge towards the player
         if self.sword_charge_timer <= self.sword_charge_cooldown:
             if player.rect.colliderect(self.hitbox):
-                player.update_hurt_animation()
+                player.update_hurt_animation(self)
                 self.sword_charge_timer = self.sword_charge_cooldown
             else:
                 if player.rect.centerx > self.rect.centerx:
@@ -503,9 +590,9 @@ class BossEnemy(pygame.sprite.Sprite):
     def load_boss_images(self, x, y):
         # Load boss enemy sprites
         self.idle_images = load_images('boss_enemy_idle', IDLE_IMAGES_COUNT)
-        self.floating_image = pygame.image.load('assets/boss_enemy_floating.png').convert_alpha()
+        self.floating_image = load_image('assets/boss_enemy_floating.png')
         self.buster_images = load_images('boss_enemy_buster', BUSTER_IMAGES_COUNT)
-        self.sword_charge_image = pygame.image.load('assets/boss_enemy_sword_charge.png').convert_alpha()
+        self.sword_charge_image = load_image('assets/boss_enemy_sword_charge.png')
 
         # Set the initial image and rect based on the current behavior
         if self.current_behavior == "idle":
@@ -559,15 +646,11 @@ class BossEnemy(pygame.sprite.Sprite):
         # Calculate the direction based on the player's position
         direction = 1 if player.rect.x > self.rect.x else -1
         bullet = Bullet(self.rect.x, self.rect.y, direction, self)  # Boss always faces right
-        all_sprites.add(bullet)
         bullet_group.add(bullet)
+        telemetry.emit("shot", shooter="boss", direction=direction, x=bullet.rect.x, y=bullet.rect.y)
 
         laser_sound.play()
 
-    def update_bullets(self):
-        for bullet in bullet_group:
-            bullet.update()
-
     def execute_buster_behavior(self):
         # Logic for buster behavior
         if self.behavior_timer % (120 * FPS) == 0:
@@ -595,14 +678,15 @@ class BossEnemy(pygame.sprite.Sprite):
         self.image = self.sword_charge_image
 
     def fire_bullets(self):
+        # Returns how many bullets were fired
         global boss_bullets_missed
 
         if self.bullet_counter < self.max_bullets and self.bullet_timer == 0:
-            for _ in range(3):
+            for _ in range(self.volley_size):
                 direction = 1 if self.rect.x < player.rect.x else -1
                 bullet = Bullet(self.rect.x, self.rect.y, direction, self)
-                all_sprites.add(bullet)
                 bullet_group.add(bullet)
+                telemetry.emit("shot", shooter="boss", direction=direction, x=bullet.rect.x, y=bullet.rect.y)
 
                 # Increment the boss bullets missed counter when the player avoids the bullets
                 if not bullet.hitbox.colliderect(player.hitbox):
@@ -610,6 +694,26 @@ class BossEnemy(pygame.sprite.Sprite):
 
             self.bullet_counter += 1
             self.bullet_timer = self.bullet_cooldown
+            return self.volley_size
+        return 0
+
+    def fire_spread(self):
+        # Fire a fan of bullets towards the player, used by the stress mode.
+        # Returns how many bullets were fired
+        if self.spread_timer > 0:
+            self.spread_timer -= 1
+            return 0
+
+        direction = 1 if self.rect.x < player.rect.x else -1
+        for i in range(self.spread_count):
+            speed_y = i - (self.spread_count - 1) // 2
+            bullet = Bullet(self.rect.x, self.rect.y, direction, self, speed_y)
+            bullet_group.add(bullet)
+        telemetry.emit("shot", shooter="boss", direction=direction, x=self.rect.x, y=self.rect.y,
+                       count=self.spread_count)
+
+        self.spread_timer = self.spread_cooldown
+        return self.spread_count
 
     def reset_bullet_counter(self):
         self.bullet_counter = 0
@@ -623,6 +727,7 @@ class BossEnemy(pygame.sprite.Sprite):
         self.reset_bullet_counter()
         self.next_behavior = random.choice(behaviors)
         self.behavior_duration = 2 * FPS
+        telemetry.emit("behavior", current=self.current_behavior, next=self.next_behavior)
 
 
 # Platform class
@@ -640,13 +745,21 @@ class Platform(pygame.sprite.Sprite):
 all_sprites = pygame.sprite.Group()
 player_group = pygame.sprite.Group()
 boss_group = pygame.sprite.Group()
-bullet_group = pygame.sprite.Group()
+bullet_group = pygame.sprite.Group()  # Bullets are updated and drawn on their own, outside all_sprites
 platform_group = pygame.sprite.Group()
 
+
+# Function to add a boss to the fight
+def spawn_boss(x, y, max_health=150):
+    boss = BossEnemy(x=x, y=y, max_health=max_health)
+    boss.load_boss_images(x, y)
+    all_sprites.add(boss)
+    boss_group.add(boss)
+    return boss
+
+
 # Create game objects
 player = Player(100, 300, max_health=50)
-boss_enemy = BossEnemy(x=400, y=375, max_health=150)
-boss_enemy.load_boss_images(400, 375)
 
 # Add platforms to the left side
 platform_left1 = Platform(160, 400, SCREEN_WIDTH // 5, 20)
@@ -657,11 +770,21 @@ platform_right1 = Platform(SCREEN_WIDTH - 50 - SCREEN_WIDTH // 5, 350, SCREEN_WI
 platform_right2 = Platform(SCREEN_WIDTH - 170 - SCREEN_WIDTH // 5, 250, SCREEN_WIDTH // 5, 20)
 
 # Add all objects to groups
-all_sprites.add(player, boss_enemy, platform_left1, platform_left2, platform_right1, platform_right2)
+all_sprites.add(player, platform_left1, platform_left2, platform_right1, platform_right2)
 player_group.add(player)
-boss_group.add(boss_enemy)
 platform_group.add(platform_left1, platform_left2, platform_right1, platform_right2)
 
+# Add the bosses: the Blue Knight alone, or a crowd of them in the stress mode
+if GAME_MODE == "stress":
+    stress_random = random.Random(0)
+    for _ in range(STRESS_BOSS_COUNT):
+        spawn_boss(stress_random.randint(200, SCREEN_WIDTH - 48), stress_random.randint(40, SCREEN_HEIGHT - 48))
+else:
+    spawn_boss(400, 375)
+
+# Bake the static level geometry (platforms, floor and walls) into a collision map
+collision_map = CollisionMap(platform_group, SCREEN_WIDTH, SCREEN_HEIGHT)
+
 # Define game states
 GAME_IN_PROGRESS = 0
 PLAYER_DEFEATED = 1
@@ -691,133 +814,162 @@ def main():
     global boss_bullets_missed
 
     running = True
+    input_buffer = InputBuffer(FPS, measure_latency=MEASURE_INPUT_LATENCY)
+    pacer = FramePacer(FPS, pacing_strategy, clock)
+    leaderboard = Leaderboard(default_leaderboard_path())
+    telemetry.start(default_telemetry_dir())
 
     # Check if the boss fight begins and set the start time
-    if boss_enemy.health > 0 and player.start_time is None:
+    if boss_group and player.start_time is None:
         player.start_time = pygame.time.get_ticks()
 
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
-        keys = pygame.key.get_pressed()
-
-        # Check game state
-        if game_state == GAME_IN_PROGRESS:
-            # Move player
-            player.speed_x = 0
-            if keys[pygame.K_a]:
-                player.speed_x = -5
-                player.facing_right = False
-            elif keys[pygame.K_d]:
-                player.speed_x = 5
-                player.facing_right = True
-
-            # Check for collisions with platforms
-            platform_collision = pygame.sprite.spritecollideany(player, platform_group)
-
-            if platform_collision:
-                # Adjust the player's position and velocity when colliding with a platform from the top
-                if player.speed_y > 0:
-                    player.rect.bottom = platform_collision.rect.top
-                    player.speed_y = 0
-
-            # Check if the player is on the ground
-            on_ground = platform_collision or player.rect.bottom == SCREEN_HEIGHT
-
-            if on_ground:
-                # Reset the vertical speed when on the ground
-                player.speed_y = 0
-
-                # Jumping (for simplicity, press 'space' to jump)
-                if keys[pygame.K_w]:
-                    player.speed_y = -12  # Adjust the jump height as needed
-
-            # Jumping (for simplicity, press 'space' to jump)
-            if keys[pygame.K_w] and player.rect.bottom == SCREEN_HEIGHT:
-                player.speed_y = -12
-
-            # Shooting (press 'backspace' to shoot)
-            if keys[pygame.K_BACKSPACE]:
+    # Everything loaded so far lives for the whole run. Freezing it keeps the garbage
+    # collector from walking it again on every full collection, which otherwise
+    # stalls a stress mode frame for over 10 ms. Bullets have no reference cycles
+    # and are freed as soon as they are killed.
+    gc.freeze()
+
+    try:
+        while running:
+            telemetry.tick += 1
+
+            input_buffer.begin_frame()
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                input_buffer.handle_event(event)
+
+            # Check game state
+            if game_state == GAME_IN_PROGRESS:
+                # Move player
+                player.speed_x = 0
+                if input_buffer.is_held("left"):
+                    player.speed_x = -5
+                    player.facing_right = False
+                elif input_buffer.is_held("right"):
+                    player.speed_x = 5
+                    player.facing_right = True
+
+                # Check if the player is standing on the floor or a platform
+                if player.on_ground:
+                    # Jumping (press 'w' to jump); a press shortly before landing is buffered
+                    if input_buffer.consume("jump") or input_buffer.is_held("jump"):
+                        player.speed_y = -12  # Adjust the jump height as needed
+
+                # Shooting (press 'backspace' to shoot); a press during the shooting animation is buffered
                 if not player.is_shooting:
-                    player.is_shooting = True
-                    direction = 1 if player.facing_right else -1
-                    bullet = Bullet(player.rect.x, player.rect.y, direction, player)
-                    all_sprites.add(bullet)
-                    bullet_group.add(bullet)
-
-            # Update sprite groups
-            all_sprites.update()
-
-            # Update boss's behavior animation
-            boss_enemy.update_behavior_animation(player.rect.centerx)
-            boss_enemy.execute_current_behavior()
-            boss_enemy.update_bullets()
-
-            # Check for collisions between player and boss hitboxes
-            if player.hitbox.colliderect(boss_enemy.hitbox) and not player.invincible:
-                player.update_hurt_animation()
-
-            # Check for bullet collisions with the boss
-            bullet_hits = pygame.sprite.groupcollide(bullet_group, boss_group, True, False)
-            for bullet in bullet_group:
-                if bullet.hitbox.colliderect(boss_enemy.hitbox):
-                    bullet.kill()
-
-            # Fire bullets based on boss behavior
-            if boss_enemy.current_behavior == "buster":
-                boss_enemy.fire_bullets()
+                    if input_buffer.consume("shoot") or input_buffer.is_held("shoot"):
+                        player.is_shooting = True
+                        direction = 1 if player.facing_right else -1
+                        bullet = Bullet(player.rect.x, player.rect.y, direction, player)
+                        bullet_group.add(bullet)
+                        telemetry.emit("shot", shooter="player", direction=direction, x=bullet.rect.x, y=bullet.rect.y)
+
+                # Update sprite groups
+                all_sprites.update()
+                update_bullets()
+
+                # Update each boss's behavior animation
+                for boss in boss_group:
+                    boss.update_behavior_animation(player.rect.centerx)
+                    boss.execute_current_behavior()
+
+                # Check for collisions between player and boss hitboxes
+                for boss in boss_group:
+                    if player.hitbox.colliderect(boss.hitbox) and not player.invincible:
+                        player.update_hurt_animation(boss)
+
+                # Fire bullets based on boss behavior; the stress mode adds spreads, and every
+                # volley is checked against the room left so the bosses together stay under the limit
+                room = STRESS_MAX_BULLETS - len(bullet_group)
+                for boss in boss_group:
+                    if boss.current_behavior == "buster" and (GAME_MODE != "stress" or room >= boss.volley_size):
+                        room -= boss.fire_bullets()
+                    if GAME_MODE == "stress" and room >= boss.spread_count:
+                        room -= boss.fire_spread()
+
+                # Check if the player or every boss is defeated
+                if player.health <= 0:
+                    game_state = PLAYER_DEFEATED
+                elif not boss_group:
+                    game_state = BOSS_DEFEATED
+
+            # Draw the background
+            screen.blit(background_image, (0, 0))
+
+            # Draw sprites on the screen
+            all_sprites.draw(screen)
+            bullet_group.draw(screen)
+
+            # Display the end screen
+            if game_state in [PLAYER_DEFEATED, BOSS_DEFEATED]:
+                # Cease all functions
+                player.speed_x = 0
+                player.speed_y = 0
 
-            # Check if the player or boss is defeated
-            if player.health <= 0:
-                game_state = PLAYER_DEFEATED
-            elif boss_enemy.health <= 0:
+            # Check if the boss is defeated and calculate the score
+            if not boss_group and not score_calculated:
                 game_state = BOSS_DEFEATED
-
-        # Draw the background
-        screen.blit(background_image, (0, 0))
-
-        # Draw sprites on the screen
-        all_sprites.draw(screen)
-
-        # Display the end screen
-        if game_state in [PLAYER_DEFEATED, BOSS_DEFEATED]:
-            # Cease all functions
-            player.speed_x = 0
-            player.speed_y = 0
-
-        # Check if the boss is defeated and calculate the score
-        if boss_enemy.health <= 0 and not score_calculated:
-            game_state = BOSS_DEFEATED
-            end_time = pygame.time.get_ticks()
-
-            # Check if player.start_time is set before calculating the time difference
-            if player.start_time is not None:
-                time_to_defeat_boss = (end_time - player.start_time) / 1000  # Convert to seconds
-                score = int(10000 / time_to_defeat_boss) + (bullets_landed * 10) - (boss_bullets_missed * 5)
-                print("Score:", score)
-
-            score_calculated = True
-
-            # Display the score
-            font = pygame.font.Font(None, 36)
-            score_text = font.render(f"Score: {score}", True, (255, 255, 255))
-            screen.blit(score_text, (SCREEN_WIDTH // 2 - 70, SCREEN_HEIGHT // 2 - 18))
-
-        # Display player's health
-        font = pygame.font.Font(None, 36)
-        health_text = font.render(f"Health: {player.health}", True, (255, 255, 255))
-        screen.blit(health_text, (10, 10))
-
-        # Update display
-        pygame.display.flip()
-
-        # Cap the frame rate
-        clock.tick(FPS)
-
-    # Quit the game
-    pygame.quit()
+                end_time = pygame.time.get_ticks()
+
+                # Check if player.start_time is set before calculating the time difference
+                if player.start_time is not None:
+                    time_to_defeat_boss = (end_time - player.start_time) / 1000  # Convert to seconds
+                    bullets_landed = player.bullets_landed
+                    score = calculate_score(time_to_defeat_boss, bullets_landed, boss_bullets_missed)
+                    telemetry.emit("score", score=score, time_to_defeat_boss=time_to_defeat_boss,
+                                   bullets_landed=bullets_landed, boss_bullets_missed=boss_bullets_missed)
+
+                    # Queue the run for the leaderboard; the write happens off the game loop.
+                    # Stress runs are not comparable with the Blue Knight fight, so they are not ranked
+                    if GAME_MODE != "stress":
+                        leaderboard.submit(PLAYER_NAME, score, time_to_defeat_boss, bullets_landed, boss_bullets_missed)
+
+                score_calculated = True
+
+            # Display the score and the top scores on the end screen
+            if score_calculated:
+                score_text = hud_font.render(f"Score: {score}", True, (255, 255, 255))
+                screen.blit(score_text, (SCREEN_WIDTH // 2 - 70, SCREEN_HEIGHT // 2 - 18))
+
+                # The top scores are the only optional drawing in the game: everything else
+                # on screen is needed to play, so this is all that is skipped over budget
+                if pacer.optional_work_allowed():
+                    for rank, (name, top_score) in enumerate(leaderboard.top_scores(), start=1):
+                        entry_text = small_font.render(f"{rank}. {name} {top_score}", True, (255, 255, 255))
+                        screen.blit(entry_text, (SCREEN_WIDTH // 2 - 70, SCREEN_HEIGHT // 2 + 10 + rank * 20))
+
+            # Display player's health
+            health_text = hud_font.render(f"Health: {player.health}", True, (255, 255, 255))
+            screen.blit(health_text, (10, 10))
+
+            # Show input latency and flash a marker on frames that handled a key press,
+            # so end-to-end latency can also be checked with a camera
+            if input_buffer.measure_latency:
+                if input_buffer.has_new_presses():
+                    screen.fill((255, 255, 255), (SCREEN_WIDTH - 30, 10, 20, 20))
+                latency_text = debug_font.render(input_buffer.latency_summary(), True, (255, 255, 255))
+                screen.blit(latency_text, (10, SCREEN_HEIGHT - 20))
+
+            # Show frame time statistics; diagnostics stay on while over budget, when they matter most
+            if SHOW_FRAME_STATS:
+                pacing_text = debug_font.render(pacer.summary_text(), True, (255, 255, 255))
+                screen.blit(pacing_text, (10, SCREEN_HEIGHT - 40))
+
+            # Update display
+            pacer.work_done()
+            pygame.display.flip()
+            input_buffer.frame_presented()
+
+            # Cap the frame rate
+            pacer.wait()
+    finally:
+        # Quit the game; the stores are always closed so queued runs and events reach disk
+        telemetry.emit("frame_pacing", **pacer.summary())
+        leaderboard.close()
+        telemetry.close()
+        pygame.quit()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,378 @@
+import random
+
+import numpy as np
+import pygame
+
+from collision_map import CollisionMap
+
+# Constants (mirroring MegaManFinalProject so agents train against the same fight)
+SCREEN_WIDTH = 640
+SCREEN_HEIGHT = 480
+FPS = 60
+PLAYER_START = (100, 300)
+PLAYER_SIZE = 32
+PLAYER_MAX_HEALTH = 50
+BOSS_START = (400, 375)
+BOSS_SIZE = 48
+BOSS_MAX_HEALTH = 150
+BULLET_SIZE = 32
+BULLET_SPEED = 14  # The game moves every bullet once per frame at this speed
+SHOOT_COOLDOWN = 20  # Frames the player's shooting animation takes before the next shot
+INVINCIBILITY_FRAMES = 3 * FPS
+BEHAVIOR_DURATION = 2 * FPS
+BOSS_MAX_VOLLEYS = 3
+BOSS_VOLLEY_COOLDOWN = int(FPS * 0.5)
+SWORD_CHARGE_SPEED = 8  # The game moves the charging boss twice per frame at 4 pixels
+MAX_EPISODE_STEPS = 60 * FPS
+LEVEL_PLATFORMS = [
+    (160, 400, SCREEN_WIDTH // 5, 20),
+    (50, 300, SCREEN_WIDTH // 5, 20),
+    (SCREEN_WIDTH - 50 - SCREEN_WIDTH // 5, 350, SCREEN_WIDTH // 5, 20),
+    (SCREEN_WIDTH - 170 - SCREEN_WIDTH // 5, 250, SCREEN_WIDTH // 5, 20),
+]
+
+# Actions, one per key: nothing, A, D, W, Backspace
+NOOP = 0
+LEFT = 1
+RIGHT = 2
+JUMP = 3
+SHOOT = 4
+ACTION_COUNT = 5
+
+BEHAVIORS = ["idle", "floating", "buster", "sword_charge"]
+
+# Observation layout: player (x, y, speed_x, speed_y, health, invincible),
+# boss (x, y, speed_x, speed_y, health, behavior id), then the nearest bullets
+# as (dx, dy, speed, owner) with owner 1 for the player and -1 for the boss
+NEAREST_BULLETS = 8
+STATE_SIZE = 12
+BULLET_FEATURES = 4
+
+PLAYER_OWNER = 1
+BOSS_OWNER = -1
+
+PIXEL_SCALE = 8  # Pixel observations are rendered at 1/PIXEL_SCALE of the screen size
+
+
+class _Platform:
+    def __init__(self, x, y, width, height):
+        self.rect = pygame.Rect(x, y, width, height)
+
+
+# MegaManBossEnv class
+class MegaManBossEnv:
+    def __init__(self, nearest_bullets=NEAREST_BULLETS, pixels=False, pixel_scale=PIXEL_SCALE,
+                 max_episode_steps=MAX_EPISODE_STEPS):
+        self.nearest_bullets = nearest_bullets
+        self.pixels = pixels
+        self.pixel_scale = pixel_scale
+        self.max_episode_steps = max_episode_steps
+
+        self.action_count = ACTION_COUNT
+        self.observation_shape = (STATE_SIZE + nearest_bullets * BULLET_FEATURES,)
+        self.pixel_shape = (SCREEN_HEIGHT // pixel_scale, SCREEN_WIDTH // pixel_scale, 3)
+
+        self.platforms = [_Platform(*platform) for platform in LEVEL_PLATFORMS]
+        self.collision_map = CollisionMap(self.platforms, SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.random = random.Random()
+
+        # Offscreen surface for pixel observations; no window is ever opened
+        self.surface = None
+        if pixels:
+            self.surface = pygame.Surface((self.pixel_shape[1], self.pixel_shape[0]))
+
+        self.reset()
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.random.seed(seed)
+
+        # Bullets are [x, y, speed, owner] lists; all share the same size
+        self.bullets = []
+        self.steps = 0
+
+        self.player_rect = pygame.Rect(PLAYER_START[0], PLAYER_START[1], PLAYER_SIZE, PLAYER_SIZE)
+        self.player_speed_x = 0
+        self.player_speed_y = 0
+        self.player_health = PLAYER_MAX_HEALTH
+        self.player_on_ground = False
+        self.player_facing_right = True
+        self.invincibility_timer = 0
+        self.shoot_timer = 0
+
+        self.boss_rect = pygame.Rect(BOSS_START[0], BOSS_START[1], BOSS_SIZE, BOSS_SIZE)
+        self.boss_speed_x = 2
+        self.boss_speed_y = 0
+        self.boss_health = BOSS_MAX_HEALTH
+        self.current_behavior = None
+        self.next_behavior = None
+        self.behavior_timer = 0
+        self.volley_counter = 0
+        self.volley_timer = 0
+        self.choose_next_behavior()
+        self.current_behavior = self.next_behavior
+        self.choose_next_behavior()
+        self.enter_behavior()
+
+        return self.observe(), {}
+
+    # Player
+
+    def hurt_player(self):
+        if self.invincibility_timer > 0:
+            return 0
+        damage = 5 if self.current_behavior == "sword_charge" else 2
+        self.player_health -= damage
+        self.invincibility_timer = INVINCIBILITY_FRAMES
+        self.player_speed_x = 0
+        self.player_speed_y = 0
+        return damage
+
+    def update_player(self, action):
+        self.player_speed_x = 0
+        if action == LEFT:
+            self.player_speed_x = -5
+            self.player_facing_right = False
+        elif action == RIGHT:
+            self.player_speed_x = 5
+            self.player_facing_right = True
+        elif action == JUMP and self.player_on_ground:
+            self.player_speed_y = -12
+        elif action == SHOOT and self.shoot_timer == 0:
+            self.shoot_timer = SHOOT_COOLDOWN
+            direction = 1 if self.player_facing_right else -1
+            self.spawn_bullet(self.player_rect, direction, PLAYER_OWNER)
+
+        rect = self.player_rect
+        rect.x += self.player_speed_x
+        self.collision_map.clamp_horizontal(rect)
+        self.player_on_ground = self.collision_map.move_vertical(rect, self.player_speed_y)
+        if self.player_on_ground:
+            self.player_speed_y = 0
+        else:
+            self.player_speed_y += 0.5
+
+        if self.shoot_timer > 0:
+            self.shoot_timer -= 1
+        if self.invincibility_timer > 0:
+            self.invincibility_timer -= 1
+
+    # Boss
+
+    def choose_next_behavior(self):
+        behaviors = [behavior for behavior in BEHAVIORS if behavior != self.current_behavior]
+        self.next_behavior = self.random.choice(behaviors)
+        self.volley_counter = 0
+
+    def enter_behavior(self):
+        if self.current_behavior == "idle":
+            self.boss_speed_x = 0
+            self.fire_volley()
+        elif self.current_behavior == "floating":
+            self.boss_speed_x = 1
+        elif self.current_behavior == "buster":
+            # Match the player's height and fire a single aimed shot
+            self.boss_rect.y = max(0, min(self.player_rect.y, SCREEN_HEIGHT - BOSS_SIZE))
+            direction = 1 if self.player_rect.x > self.boss_rect.x else -1
+            self.spawn_bullet(self.boss_rect, direction, BOSS_OWNER)
+
+    def fire_volley(self):
+        if self.volley_counter < BOSS_MAX_VOLLEYS and self.volley_timer == 0:
+            direction = 1 if self.boss_rect.x < self.player_rect.x else -1
+            self.spawn_bullet(self.boss_rect, direction, BOSS_OWNER)
+            self.volley_counter += 1
+            self.volley_timer = BOSS_VOLLEY_COOLDOWN
+
+    def update_boss(self):
+        rect = self.boss_rect
+        rect.x += self.boss_speed_x
+        self.collision_map.move_vertical(rect, self.boss_speed_y, one_way=False)
+        if rect.right > SCREEN_WIDTH or rect.left < 0:
+            self.boss_speed_x *= -1
+
+        if self.volley_timer > 0:
+            self.volley_timer -= 1
+
+        damage = 0
+        if self.current_behavior == "sword_charge":
+            if rect.colliderect(self.player_rect):
+                damage += self.hurt_player()
+            elif self.player_rect.centerx > rect.centerx:
+                rect.x += SWORD_CHARGE_SPEED
+            else:
+                rect.x -= SWORD_CHARGE_SPEED
+        elif self.current_behavior == "buster":
+            self.fire_volley()
+        rect.x = max(0, min(rect.x, SCREEN_WIDTH - BOSS_SIZE))
+
+        self.behavior_timer += 1
+        if self.behavior_timer >= BEHAVIOR_DURATION:
+            self.current_behavior = self.next_behavior
+            self.behavior_timer = 0
+            self.choose_next_behavior()
+            self.enter_behavior()
+
+        if rect.colliderect(self.player_rect):
+            damage += self.hurt_player()
+        return damage
+
+    # Bullets
+
+    def spawn_bullet(self, shooter_rect, direction, owner):
+        if direction == 1:
+            x = shooter_rect.x + shooter_rect.width
+        else:
+            x = shooter_rect.x - BULLET_SIZE
+        self.bullets.append([x, shooter_rect.y, BULLET_SPEED * direction, owner])
+
+    def update_bullets(self):
+        damage_dealt = 0
+        damage_taken = 0
+        player = self.player_rect
+        boss = self.boss_rect
+        alive = []
+
+        for bullet in self.bullets:
+            x, y, speed, owner = bullet
+            x += speed
+            if owner == PLAYER_OWNER:
+                target = boss
+            else:
+                target = player
+            if (x < target.right and x + BULLET_SIZE > target.left
+                    and y < target.bottom and y + BULLET_SIZE > target.top):
+                if owner == PLAYER_OWNER:
+                    self.boss_health -= 5
+                    damage_dealt += 5
+                else:
+                    damage_taken += self.hurt_player()
+                continue
+            if x + BULLET_SIZE <= 0 or x >= SCREEN_WIDTH:
+                continue
+            bullet[0] = x
+            alive.append(bullet)
+
+        self.bullets = alive
+        return damage_dealt, damage_taken
+
+    # Stepping
+
+    def step(self, action):
+        self.steps += 1
+        self.update_player(action)
+        damage_taken = self.update_boss()
+        damage_dealt, bullet_damage = self.update_bullets()
+        damage_taken += bullet_damage
+
+        reward = (damage_dealt - damage_taken) * 0.1
+        terminated = False
+        if self.boss_health <= 0:
+            reward += 10
+            terminated = True
+        elif self.player_health <= 0:
+            reward -= 10
+            terminated = True
+        truncated = not terminated and self.steps >= self.max_episode_steps
+
+        info = {"damage_dealt": damage_dealt, "damage_taken": damage_taken}
+        return self.observe(), reward, terminated, truncated, info
+
+    def observe_state(self):
+        player = self.player_rect
+        boss = self.boss_rect
+        state = [
+            player.x / SCREEN_WIDTH, player.y / SCREEN_HEIGHT,
+            self.player_speed_x / 10, self.player_speed_y / 10,
+            self.player_health / PLAYER_MAX_HEALTH, 1.0 if self.invincibility_timer > 0 else 0.0,
+            boss.x / SCREEN_WIDTH, boss.y / SCREEN_HEIGHT,
+            self.boss_speed_x / 10, self.boss_speed_y / 10,
+            self.boss_health / BOSS_MAX_HEALTH, BEHAVIORS.index(self.current_behavior),
+        ]
+
+        # Nearest bullets to the player, padded with zeros
+        px = player.x
+        py = player.y
+        bullets = sorted(self.bullets, key=lambda b: (b[0] - px) ** 2 + (b[1] - py) ** 2)
+        for x, y, speed, owner in bullets[:self.nearest_bullets]:
+            state += ((x - px) / SCREEN_WIDTH, (y - py) / SCREEN_HEIGHT, speed / 10, owner)
+        state += [0.0] * (self.observation_shape[0] - len(state))
+        return np.array(state, dtype=np.float32)
+
+    def render_pixels(self):
+        surface = self.surface
+        if surface is None:
+            surface = self.surface = pygame.Surface((self.pixel_shape[1], self.pixel_shape[0]))
+        scale = self.pixel_scale
+
+        def draw(rect, color):
+            surface.fill(color, (rect[0] // scale, rect[1] // scale,
+                                 max(1, rect[2] // scale), max(1, rect[3] // scale)))
+
+        surface.fill((0, 0, 0))
+        for platform in self.platforms:
+            draw(platform.rect, (255, 165, 0))
+        draw(self.boss_rect, (0, 0, 255))
+        draw(self.player_rect, (0, 255, 0))
+        for x, y, speed, owner in self.bullets:
+            draw((int(x), y, BULLET_SIZE, BULLET_SIZE), (255, 255, 255) if owner == PLAYER_OWNER else (255, 0, 0))
+
+        # surfarray is indexed (x, y); observations are (height, width, channels)
+        return pygame.surfarray.array3d(surface).transpose(1, 0, 2)
+
+    def observe(self):
+        if self.pixels:
+            return {"state": self.observe_state(), "pixels": self.render_pixels()}
+        return self.observe_state()
+
+
+# VectorBossEnv class
+class VectorBossEnv:
+    # Steps a batch of environments and stacks their results. Finished
+    # environments are reset automatically; their last observation is kept in
+    # info["final_observation"].
+    def __init__(self, num_envs, **env_kwargs):
+        self.num_envs = num_envs
+        self.envs = [MegaManBossEnv(**env_kwargs) for _ in range(num_envs)]
+        self.action_count = ACTION_COUNT
+        self.observation_shape = (num_envs,) + self.envs[0].observation_shape
+        self.pixels = self.envs[0].pixels
+
+        self.states = np.zeros(self.observation_shape, dtype=np.float32)
+        self.frames = None
+        if self.pixels:
+            self.frames = np.zeros((num_envs,) + self.envs[0].pixel_shape, dtype=np.uint8)
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+
+    def _store(self, index, observation):
+        if self.pixels:
+            self.states[index] = observation["state"]
+            self.frames[index] = observation["pixels"]
+        else:
+            self.states[index] = observation
+
+    def _batch(self):
+        if self.pixels:
+            return {"state": self.states.copy(), "pixels": self.frames.copy()}
+        return self.states.copy()
+
+    def reset(self, seed=None):
+        for index, env in enumerate(self.envs):
+            observation, _ = env.reset(None if seed is None else seed + index)
+            self._store(index, observation)
+        return self._batch(), {}
+
+    def step(self, actions):
+        infos = []
+        for index, env in enumerate(self.envs):
+            observation, reward, terminated, truncated, info = env.step(int(actions[index]))
+            if terminated or truncated:
+                info["final_observation"] = observation
+                observation, _ = env.reset()
+            self._store(index, observation)
+            self.rewards[index] = reward
+            self.terminated[index] = terminated
+            self.truncated[index] = truncated
+            infos.append(info)
+        return self._batch(), self.rewards.copy(), self.terminated.copy(), self.truncated.copy(), infos
@@ -0,0 +1,157 @@
+# Constants
+COLUMN_WIDTH = 8  # Width in pixels of one column of the collision map
+
+
+# CollisionMap class
+class CollisionMap:
+    # Static level geometry baked into per-column lookup tables at load time.
+    # Every lookup is a list index, so the cost of resolving an actor does not
+    # grow with the number of platforms in the level.
+    def __init__(self, platforms, width, height, solids=(), column_width=COLUMN_WIDTH):
+        self.width = width
+        self.height = height
+        self.column_width = column_width
+        self.column_count = (width + column_width - 1) // column_width
+
+        platform_rects = [platform.rect for platform in platforms]
+        solid_rects = [getattr(solid, "rect", solid) for solid in solids]
+
+        # Platforms can be jumped through from below and landed on from above,
+        # solids block from every side. The floor and the walls are the screen edges.
+        self.ground, self.ground_edges = self._build_ground_table(platform_rects + solid_rects)
+        self.solid_ground, self.solid_ground_edges = self._build_ground_table(solid_rects)
+        self.ceiling, self.ceiling_edges = self._build_ceiling_table(solid_rects)
+
+    def _columns_covered(self, rect):
+        first = max(0, rect.left // self.column_width)
+        last = min(self.column_count - 1, (rect.right - 1) // self.column_width)
+        return range(first, last + 1)
+
+    def _split_columns(self, rects, edge):
+        # Columns a rect spans completely go into the lookup table. Columns it only
+        # partly covers keep the rect itself, so its exact x-span is checked and a
+        # surface never reaches past the edge it is drawn with.
+        values = [set() for _ in range(self.column_count)]
+        edges = [[] for _ in range(self.column_count)]
+        for rect in rects:
+            for column in self._columns_covered(rect):
+                left = column * self.column_width
+                if rect.left <= left and rect.right >= left + self.column_width:
+                    values[column].add(getattr(rect, edge))
+                else:
+                    edges[column].append(rect)
+        return values, edges
+
+    def _build_ground_table(self, rects):
+        # ground[column][y] is the highest surface top at or below y, or the floor
+        tops, edges = self._split_columns(rects, "top")
+
+        table = []
+        for column_tops in tops:
+            column = [self.height] * (self.height + 1)
+            nearest = self.height
+            for y in range(self.height, -1, -1):
+                if y in column_tops:
+                    nearest = y
+                column[y] = nearest
+            table.append(column)
+        return table, edges
+
+    def _build_ceiling_table(self, rects):
+        # ceiling[column][y] is the lowest solid bottom at or above y, or the top of the screen
+        bottoms, edges = self._split_columns(rects, "bottom")
+
+        table = []
+        for column_bottoms in bottoms:
+            column = [0] * (self.height + 1)
+            nearest = 0
+            for y in range(self.height + 1):
+                if y in column_bottoms:
+                    nearest = y
+                column[y] = nearest
+            table.append(column)
+        return table, edges
+
+    def _clamp_y(self, y):
+        return max(0, min(int(y), self.height))
+
+    def _column_at(self, x):
+        return max(0, min(int(x) // self.column_width, self.column_count - 1))
+
+    def ground_at(self, x, y, one_way=True):
+        # Top of the first surface at or below (x, y)
+        column = self._column_at(x)
+        y = self._clamp_y(y)
+        if one_way:
+            ground = self.ground[column][y]
+            edges = self.ground_edges[column]
+        else:
+            ground = self.solid_ground[column][y]
+            edges = self.solid_ground_edges[column]
+        for rect in edges:
+            if y <= rect.top < ground and rect.left <= x < rect.right:
+                ground = rect.top
+        return ground
+
+    def ceiling_at(self, x, y):
+        # Bottom of the first solid surface at or above (x, y)
+        column = self._column_at(x)
+        y = self._clamp_y(y)
+        ceiling = self.ceiling[column][y]
+        for rect in self.ceiling_edges[column]:
+            if ceiling < rect.bottom <= y and rect.left <= x < rect.right:
+                ceiling = rect.bottom
+        return ceiling
+
+    def ground_under(self, rect, y, one_way=True):
+        if one_way:
+            table = self.ground
+            edge_table = self.ground_edges
+        else:
+            table = self.solid_ground
+            edge_table = self.solid_ground_edges
+        y = self._clamp_y(y)
+
+        ground = self.height
+        for column in self._columns_covered(rect):
+            ground = min(ground, table[column][y])
+            for edge in edge_table[column]:
+                if y <= edge.top < ground and edge.left < rect.right and edge.right > rect.left:
+                    ground = edge.top
+        return ground
+
+    def ceiling_over(self, rect, y):
+        y = self._clamp_y(y)
+
+        ceiling = 0
+        for column in self._columns_covered(rect):
+            ceiling = max(ceiling, self.ceiling[column][y])
+            for edge in self.ceiling_edges[column]:
+                if ceiling < edge.bottom <= y and edge.left < rect.right and edge.right > rect.left:
+                    ceiling = edge.bottom
+        return ceiling
+
+    def clamp_horizontal(self, rect):
+        # Keep the rect between the walls
+        rect.x = max(0, min(rect.x, self.width - rect.width))
+
+    def move_vertical(self, rect, dy, one_way=True):
+        # Sweep the rect by dy and stop it on the first surface in the way.
+        # Returns True when the rect ends up standing on a surface.
+        if dy >= 0:
+            # Like the original overlap check, a platform caught anywhere along
+            # the body while falling lifts the actor onto it
+            probe = rect.top if one_way else rect.bottom
+            ground = self.ground_under(rect, probe, one_way)
+            if rect.bottom + dy >= ground:
+                rect.bottom = ground
+                return True
+            rect.y += dy
+            return False
+
+        ceiling = self.ceiling_over(rect, rect.top)
+        if rect.top + dy <= ceiling:
+            rect.top = ceiling
+        else:
+            rect.y += dy
+        return False
@@ -0,0 +1,159 @@
+import collections
+import os
+import time
+
+import pygame
+
+# Constants
+SLEEP = "sleep"  # Sleep until the deadline: cheap on the CPU but the OS may oversleep by a few milliseconds
+HYBRID = "hybrid"  # Sleep most of the frame, then busy-wait on perf_counter until the deadline
+VSYNC = "vsync"  # Let display.flip() wait for the monitor's refresh
+STRATEGIES = [SLEEP, HYBRID, VSYNC]
+DEFAULT_STRATEGY = HYBRID
+
+SLEEP_MARGIN = 0.002  # Seconds left to busy-wait after sleeping in the hybrid strategy
+MISS_TOLERANCE = 0.001  # Seconds a frame may run over its budget before counting as a miss
+HISTORY_FRAMES = 240  # Frames kept for the frame time statistics
+OVER_BUDGET_WORK = 0.8  # Share of the budget spent on work that counts as over budget
+UNDER_BUDGET_WORK = 0.5  # Share of the budget spent on work that counts as having room again
+QUALITY_DROP_FRAMES = 3  # Over-budget frames in a row before optional visual work is reduced
+QUALITY_RESTORE_FRAMES = 120  # Frames with room in a row before it is restored
+
+
+def default_strategy():
+    strategy = os.environ.get("MEGAMAN_PACING", DEFAULT_STRATEGY)
+    return strategy if strategy in STRATEGIES else DEFAULT_STRATEGY
+
+
+def create_display(size, strategy):
+    # Vsync needs SCALED (or OpenGL) display flags; fall back to hybrid pacing
+    # when the driver refuses it
+    if strategy == VSYNC:
+        try:
+            return pygame.display.set_mode(size, pygame.SCALED, vsync=1), VSYNC
+        except pygame.error:
+            strategy = HYBRID
+    return pygame.display.set_mode(size), strategy
+
+
+# FramePacer class
+class FramePacer:
+    def __init__(self, fps, strategy=DEFAULT_STRATEGY, clock=None):
+        self.fps = fps
+        self.strategy = strategy
+        self.clock = clock if clock is not None else pygame.time.Clock()
+        self.budget = 1 / fps
+
+        # Frame time statistics
+        self.frame_times = collections.deque(maxlen=HISTORY_FRAMES)
+        self.frame_count = 0
+        self.missed_deadlines = 0
+        self.dropped_frames = 0
+        self.last_frame_end = None
+        self.last_work_time = 0
+        self.work_end = None
+        self.deadline = None  # perf_counter time the current frame should end
+
+        # Optional visual work is switched off while the frame budget is blown
+        self.reduced_quality = False
+        self.over_budget_streak = 0
+        self.under_budget_streak = 0
+
+    def work_done(self):
+        # Call right before display.flip(); with vsync the flip blocks until the
+        # refresh, and that wait must not count as work
+        self.work_end = time.perf_counter()
+
+    def wait(self):
+        # Call once per frame after display.flip()
+        now = time.perf_counter()
+        if self.last_frame_end is not None:
+            work_end = self.work_end if self.work_end is not None else now
+            self.last_work_time = work_end - self.last_frame_end
+            self._update_quality()
+        self.work_end = None
+
+        # Frames end on a fixed perf_counter schedule; pygame's Clock only counts
+        # whole milliseconds, so tick(60) would aim for 16 ms frames (62.5 FPS)
+        if self.deadline is None:
+            self.deadline = now + self.budget
+        remaining = self.deadline - now
+        if self.strategy == SLEEP:
+            if remaining > 0:
+                pygame.time.wait(round(remaining * 1000))
+        elif self.strategy == HYBRID or remaining > SLEEP_MARGIN:
+            # With vsync this only happens when display.flip() did not wait for
+            # the refresh, so the frame rate stays capped either way
+            if remaining > SLEEP_MARGIN:
+                pygame.time.wait(int((remaining - SLEEP_MARGIN) * 1000))
+            while time.perf_counter() < self.deadline:
+                pass
+        # Otherwise display.flip() already waited for the refresh
+        self.clock.tick()  # Bookkeeping only, for clock.get_fps()
+
+        frame_end = time.perf_counter()
+        if self.last_frame_end is not None:
+            self._record(frame_end - self.last_frame_end)
+        self.last_frame_end = frame_end
+
+        # The next deadline is one budget after this one, so early or late wake-ups
+        # do not add up. A frame that overran by more than a whole budget starts a
+        # new schedule instead of rushing the following frames. With vsync the
+        # refresh sets the schedule.
+        self.deadline += self.budget
+        if self.strategy == VSYNC or frame_end > self.deadline:
+            self.deadline = frame_end + self.budget
+
+    def _record(self, frame_time):
+        self.frame_times.append(frame_time)
+        self.frame_count += 1
+        if frame_time > self.budget + MISS_TOLERANCE:
+            self.missed_deadlines += 1
+            # Every whole refresh interval the frame covered beyond its own is a dropped frame
+            self.dropped_frames += max(0, int(frame_time / self.budget + 0.5) - 1)
+
+    def _update_quality(self):
+        if self.last_work_time > self.budget * OVER_BUDGET_WORK:
+            self.over_budget_streak += 1
+            self.under_budget_streak = 0
+            if self.over_budget_streak >= QUALITY_DROP_FRAMES:
+                self.reduced_quality = True
+        else:
+            self.over_budget_streak = 0
+            if self.last_work_time < self.budget * UNDER_BUDGET_WORK:
+                self.under_budget_streak += 1
+                if self.under_budget_streak >= QUALITY_RESTORE_FRAMES:
+                    self.reduced_quality = False
+
+    def optional_work_allowed(self):
+        return not self.reduced_quality
+
+    def mean_frame_time(self):
+        if not self.frame_times:
+            return 0
+        return sum(self.frame_times) / len(self.frame_times)
+
+    def frame_time_variance(self):
+        if len(self.frame_times) < 2:
+            return 0
+        mean = self.mean_frame_time()
+        return sum((frame_time - mean) ** 2 for frame_time in self.frame_times) / (len(self.frame_times) - 1)
+
+    def summary(self):
+        return {
+            "strategy": self.strategy,
+            "frames": self.frame_count,
+            "mean_ms": self.mean_frame_time() * 1000,
+            "stddev_ms": self.frame_time_variance() ** 0.5 * 1000,
+            "missed_deadlines": self.missed_deadlines,
+            "dropped_frames": self.dropped_frames,
+            "reduced_quality": self.reduced_quality,
+        }
+
+    def summary_text(self):
+        summary = self.summary()
+        text = (f"{summary['strategy']}: {summary['mean_ms']:.2f} ms +/- {summary['stddev_ms']:.2f}, "
+                f"missed {summary['missed_deadlines']}, dropped {summary['dropped_frames']}")
+        if summary["reduced_quality"]:
+            text += ", reduced quality"
+        return text
@@ -0,0 +1,176 @@
+import collections
+import os
+import time
+
+import pygame
+
+# Constants
+DEFAULT_BINDINGS = {
+    "left": [pygame.K_a],
+    "right": [pygame.K_d],
+    "jump": [pygame.K_w],
+    "shoot": [pygame.K_BACKSPACE],
+}
+BUFFER_WINDOWS = {
+    "jump": 6,  # Frames a jump press is remembered while the player is still in the air
+    "shoot": 6,  # Frames a shot is remembered while the shooting animation finishes
+}
+HISTORY_SIZE = 256  # Key events kept for inspection
+
+
+def parse_bindings(text):
+    # Parses overrides like "jump=space,up;shoot=j" into {action: [key codes]}.
+    # Unknown key names are skipped; an action left without keys keeps its default.
+    bindings = {}
+    for entry in text.split(";"):
+        if "=" not in entry:
+            continue
+        action, names = entry.split("=", 1)
+        keys = []
+        for name in names.split(","):
+            if not name.strip():
+                continue
+            try:
+                keys.append(pygame.key.key_code(name.strip()))
+            except ValueError:
+                continue
+        if keys:
+            bindings[action.strip()] = keys
+    return bindings
+
+
+def default_bindings():
+    bindings = {action: list(keys) for action, keys in DEFAULT_BINDINGS.items()}
+    bindings.update(parse_bindings(os.environ.get("MEGAMAN_BINDINGS", "")))
+    return bindings
+
+
+# InputBuffer class
+class InputBuffer:
+    # Records KEYDOWN/KEYUP events as they arrive instead of sampling the
+    # keyboard once per frame, so a tap shorter than a frame is never lost
+    def __init__(self, fps, bindings=None, buffer_windows=BUFFER_WINDOWS, measure_latency=False):
+        self.buffer_windows = dict(buffer_windows)
+        self.frame = 0
+        self.held_keys = set()  # Bound keys currently down; an action stays held while any of its keys is
+        self.pressed_at = {}  # action -> frame of the latest unconsumed press
+        self.history = collections.deque(maxlen=HISTORY_SIZE)  # (frame, timestamp, action, is_down)
+
+        self.key_actions = {}
+        self.rebind_all(bindings if bindings is not None else default_bindings())
+
+        # Input-to-display latency measurement
+        self.measure_latency = measure_latency
+        self.latency_budget = 1 / fps  # One frame
+        self.presses_this_frame = []  # Timestamps of presses handled this frame
+        # Events carry no timestamp, so a press may have waited in the queue since
+        # the previous poll; that poll time gives the worst-case latency
+        self.poll_time = None
+        self.previous_poll_time = None
+        self.worst_case_press_this_frame = False
+        self.worst_latency_count = 0
+        self.worst_latency_total = 0
+        self.worst_latency_max = 0
+        self.worst_latency_over_budget = 0
+        self.last_worst_latency = 0
+        self.latency_count = 0
+        self.latency_total = 0
+        self.latency_max = 0
+        self.latency_over_budget = 0
+        self.last_latency = 0
+
+    def rebind_all(self, bindings):
+        self.key_actions = {}
+        for action, keys in bindings.items():
+            for key in keys:
+                self.key_actions[key] = action
+        self.held_keys.clear()
+
+    def rebind(self, action, keys):
+        old_keys = [key for key, bound in self.key_actions.items() if bound == action]
+        self.key_actions = {key: bound for key, bound in self.key_actions.items() if bound != action}
+        for key in keys:
+            self.key_actions[key] = action
+        self.held_keys.difference_update(old_keys)
+        self.held_keys.difference_update(keys)
+
+    def begin_frame(self):
+        # Call right before polling events
+        self.frame += 1
+        self.previous_poll_time = self.poll_time
+        self.poll_time = time.perf_counter()
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
+            action = self.key_actions.get(event.key)
+            if action is None:
+                return
+            timestamp = time.perf_counter()
+            is_down = event.type == pygame.KEYDOWN
+
+            if is_down:
+                self.held_keys.add(event.key)
+                self.pressed_at[action] = self.frame
+                if self.measure_latency:
+                    self.presses_this_frame.append(timestamp)
+                    self.worst_case_press_this_frame = self.previous_poll_time is not None
+            else:
+                self.held_keys.discard(event.key)
+
+            self.history.append((self.frame, timestamp, action, is_down))
+
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            # KEYUP never arrives for keys released while unfocused
+            self.held_keys.clear()
+
+    def is_held(self, action):
+        return any(self.key_actions.get(key) == action for key in self.held_keys)
+
+    def consume(self, action):
+        # True once for a press made within the action's buffer window
+        pressed_at = self.pressed_at.pop(action, None)
+        if pressed_at is None:
+            return False
+        return self.frame - pressed_at <= self.buffer_windows.get(action, 0)
+
+    def frame_presented(self):
+        # Call right after display.flip() to time every press handled this frame
+        if not self.presses_this_frame:
+            return
+        now = time.perf_counter()
+        for timestamp in self.presses_this_frame:
+            latency = now - timestamp
+            self.latency_count += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            if latency > self.latency_budget:
+                self.latency_over_budget += 1
+            self.last_latency = latency
+        self.presses_this_frame = []
+
+        # The earliest the press could have happened is just after the previous poll
+        if self.worst_case_press_this_frame:
+            latency = now - self.previous_poll_time
+            self.worst_latency_count += 1
+            self.worst_latency_total += latency
+            self.worst_latency_max = max(self.worst_latency_max, latency)
+            if latency > self.latency_budget:
+                self.worst_latency_over_budget += 1
+            self.last_worst_latency = latency
+            self.worst_case_press_this_frame = False
+
+    def has_new_presses(self):
+        return bool(self.presses_this_frame)
+
+    def latency_summary(self):
+        # Figures are "from the poll / worst case from the previous poll"
+        if self.latency_count == 0:
+            return "Latency: no input yet"
+        average = self.latency_total / self.latency_count * 1000
+        worst_average = 0
+        if self.worst_latency_count:
+            worst_average = self.worst_latency_total / self.worst_latency_count * 1000
+        return (f"Latency ms (polled / worst case): last {self.last_latency * 1000:.1f} / "
+                f"{self.last_worst_latency * 1000:.1f}, avg {average:.1f} / {worst_average:.1f}, "
+                f"max {self.latency_max * 1000:.1f} / {self.worst_latency_max * 1000:.1f}, "
+                f"over budget {self.latency_over_budget} / {self.worst_latency_over_budget}")
@@ -0,0 +1,152 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# Constants
+LEADERBOARD_PATH = "leaderboard.db"
+TOP_SCORES_COUNT = 10
+BATCH_SIZE = 64  # Max runs written in one transaction
+FLUSH_INTERVAL = 0.5  # Seconds the writer waits for more runs before committing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    time_to_defeat_boss REAL NOT NULL,
+    bullets_landed INTEGER NOT NULL,
+    boss_bullets_missed INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    day TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_score ON runs (score DESC);
+CREATE INDEX IF NOT EXISTS runs_player_score ON runs (player, score DESC);
+CREATE INDEX IF NOT EXISTS runs_day_score ON runs (day, score DESC);
+"""
+
+# Sentinel telling the writer thread to flush and exit
+_STOP = object()
+
+
+def calculate_score(time_to_defeat_boss, bullets_landed, boss_bullets_missed):
+    return int(10000 / time_to_defeat_boss) + (bullets_landed * 10) - (boss_bullets_missed * 5)
+
+
+# Leaderboard class
+class Leaderboard:
+    def __init__(self, path=LEADERBOARD_PATH):
+        self.path = path
+        self.pending = queue.Queue()
+
+        # Create the schema up front so reads work before the first write lands
+        connection = self._connect()
+        with connection:
+            connection.executescript(SCHEMA)
+
+        # Cached top scores for the end screen, refreshed by the writer thread after
+        # every commit so the game loop never touches the disk to draw them
+        self.top_scores_cache = self._read_top_scores(connection)
+        self.cache_lock = threading.Lock()
+        connection.close()
+
+        # Disk writes happen on this thread so the game loop never waits on them
+        self.writer = threading.Thread(target=self._write_loop, name="leaderboard-writer", daemon=True)
+        self.writer.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def submit(self, player, score, time_to_defeat_boss, bullets_landed, boss_bullets_missed):
+        # Only enqueues the run; the writer thread commits it
+        created_at = time.time()
+        day = time.strftime("%Y-%m-%d", time.localtime(created_at))
+        self.pending.put((player, int(score), float(time_to_defeat_boss), int(bullets_landed),
+                          int(boss_bullets_missed), created_at, day))
+
+    def _write_loop(self):
+        connection = self._connect()
+        running = True
+
+        while running:
+            run = self.pending.get()
+            if run is _STOP:
+                break
+
+            # Gather whatever else arrives within the flush interval into one batch
+            batch = [run]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    run = self.pending.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if run is _STOP:
+                    running = False
+                    break
+                batch.append(run)
+
+            with connection:
+                connection.executemany(
+                    "INSERT INTO runs (player, score, time_to_defeat_boss, bullets_landed,"
+                    " boss_bullets_missed, created_at, day) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    batch)
+
+            rows = self._read_top_scores(connection)
+            with self.cache_lock:
+                self.top_scores_cache = rows
+
+        connection.close()
+
+    def _read_top_scores(self, connection):
+        return connection.execute("SELECT player, score FROM runs ORDER BY score DESC LIMIT ?",
+                                  (TOP_SCORES_COUNT,)).fetchall()
+
+    def _query(self, sql, params):
+        connection = sqlite3.connect(self.path, timeout=5)
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def top_scores(self, limit=TOP_SCORES_COUNT):
+        # The end screen is served from the cache; other limits go to the database
+        if limit == TOP_SCORES_COUNT:
+            with self.cache_lock:
+                return self.top_scores_cache
+        return self._query("SELECT player, score FROM runs ORDER BY score DESC LIMIT ?", (limit,))
+
+    def top_scores_for_player(self, player, limit=TOP_SCORES_COUNT):
+        return self._query("SELECT player, score FROM runs WHERE player = ? ORDER BY score DESC LIMIT ?",
+                           (player, limit))
+
+    def top_scores_for_day(self, day=None, limit=TOP_SCORES_COUNT):
+        # Day is formatted as YYYY-MM-DD and defaults to today
+        if day is None:
+            day = time.strftime("%Y-%m-%d")
+        return self._query("SELECT player, score FROM runs WHERE day = ? ORDER BY score DESC LIMIT ?",
+                           (day, limit))
+
+    def flush(self):
+        # Block until every submitted run has been committed
+        self.pending.put(_STOP)
+        self.writer.join()
+
+        # Restart the writer so the leaderboard stays usable
+        self.writer = threading.Thread(target=self._write_loop, name="leaderboard-writer", daemon=True)
+        self.writer.start()
+
+    def close(self):
+        self.pending.put(_STOP)
+        self.writer.join()
+
+
+def default_leaderboard_path():
+    return os.environ.get("MEGAMAN_LEADERBOARD", LEADERBOARD_PATH)
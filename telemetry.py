@@ -0,0 +1,104 @@
+import collections
+import gzip
+import json
+import os
+import threading
+import time
+
+# Constants
+TELEMETRY_DIR = "telemetry"
+QUEUE_CAPACITY = 8192  # Events held before new ones are dropped
+ROTATE_EVENTS = 100000  # Events written to one file before rotating
+KEEP_FILES = 10  # Rotated files kept on disk
+DRAIN_INTERVAL = 0.05  # Seconds the writer sleeps when the queue is empty
+
+
+# Telemetry class
+class Telemetry:
+    def __init__(self, capacity=QUEUE_CAPACITY):
+        # deque.append and deque.popleft are atomic, so the game thread and the
+        # writer thread share it without a lock
+        self.events = collections.deque()
+        self.capacity = capacity
+        self.dropped = 0  # Events lost because the writer fell behind
+        self.written = 0
+        self.tick = 0  # Frame counter stamped onto every event, advanced by the game loop
+
+        self.directory = None
+        self.writer = None
+        self.stop_event = threading.Event()
+
+    def emit(self, event, **fields):
+        # Never blocks: if the queue is full the event is counted and discarded
+        if len(self.events) >= self.capacity:
+            self.dropped += 1
+            return
+        fields["event"] = event
+        fields["tick"] = self.tick
+        self.events.append(fields)
+
+    def start(self, directory=TELEMETRY_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.stop_event.clear()
+        self.writer = threading.Thread(target=self._write_loop, name="telemetry-writer", daemon=True)
+        self.writer.start()
+
+    def _open_file(self):
+        path = os.path.join(self.directory, time.strftime("events-%Y%m%d-%H%M%S") + f"-{self.written:012d}.jsonl.gz")
+        self._remove_old_files()
+        return gzip.open(path, "at", encoding="utf-8")
+
+    def _remove_old_files(self):
+        files = sorted(name for name in os.listdir(self.directory) if name.endswith(".jsonl.gz"))
+        for name in files[:max(0, len(files) - KEEP_FILES + 1)]:
+            os.remove(os.path.join(self.directory, name))
+
+    def _write_summary(self, log_file):
+        # Record how many events were lost so the analysis can account for gaps
+        log_file.write(json.dumps({"event": "telemetry_summary", "tick": self.tick,
+                                   "written": self.written, "dropped": self.dropped}, separators=(",", ":")) + "\n")
+
+    def _write_loop(self):
+        log_file = self._open_file()
+        events_in_file = 0
+        reported_drops = 0
+
+        while True:
+            stopping = self.stop_event.is_set()
+
+            while self.events:
+                log_file.write(json.dumps(self.events.popleft(), separators=(",", ":")) + "\n")
+                self.written += 1
+                events_in_file += 1
+
+                # Rotate to a fresh compressed file once this one is full
+                if events_in_file >= ROTATE_EVENTS:
+                    self._write_summary(log_file)
+                    reported_drops = self.dropped
+                    log_file.close()
+                    log_file = self._open_file()
+                    events_in_file = 0
+
+            # Report new drops as they happen, so a crash does not lose the count
+            if self.dropped != reported_drops:
+                self._write_summary(log_file)
+                reported_drops = self.dropped
+
+            if stopping:
+                break
+            self.stop_event.wait(DRAIN_INTERVAL)
+
+        self._write_summary(log_file)
+        log_file.close()
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.stop_event.set()
+        self.writer.join()
+        self.writer = None
+
+
+def default_telemetry_dir():
+    return os.environ.get("MEGAMAN_TELEMETRY", TELEMETRY_DIR)